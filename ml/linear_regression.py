@@ -1,13 +1,37 @@
 """Implementation of linear regression"""
 
 import numpy as np
+from scipy.linalg import LinAlgError, cho_factor, cho_solve
 
 
 class LinearRegression:
-    def __init__(self, optimizer: str = "gradient_descent", learning_rate: float = 0.01, iterations: int = 1000):
+    def __init__(self, optimizer: str = "gradient_descent", learning_rate: float = 0.01, iterations: int = 1000,
+                 backend: str = "numpy"):
+        """
+        Arguments:
+            optimizer: "gradient_descent" or "normal_equation"
+            learning_rate: The gradient descent step size
+            iterations: The number of gradient descent steps
+            backend: "numpy", or "jax" to run gradient descent as a single
+                jit-compiled loop (requires jax). Unless jax_enable_x64 is
+                set, jax computes in float32; the weights are still returned
+                as float64.
+        """
+        if optimizer not in ("gradient_descent", "normal_equation"):
+            raise ValueError(f"Unknown optimizer: {optimizer}")
+        if backend not in ("numpy", "jax"):
+            raise ValueError(f"Unknown backend: {backend}")
+        if backend == "jax" and optimizer == "normal_equation":
+            raise ValueError("The jax backend only supports gradient descent")
         self.optimizer = optimizer
         self.learning_rate = learning_rate
         self.iterations = iterations
+        self.backend = backend
+        self._fit_impl = {
+            ("gradient_descent", "numpy"): self._gradient_descent,
+            ("gradient_descent", "jax"): self._gradient_descent_jax,
+            ("normal_equation", "numpy"): self._normal_equation,
+        }[optimizer, backend]
 
     def fit(self, X: np.ndarray, y: np.ndarray) -> None:
         """Fit the model to the data
@@ -16,29 +40,54 @@ class LinearRegression:
             X: The training data
             y: The target values
         """
-        self.X = X
-        self.y = y
+        self.X = np.asarray(X, dtype=float)
+        self.y = np.asarray(y, dtype=float)
         self._initialize_weights()
-        self._optimize()
-
-        if self.optimizer == "gradient_descent":
-            self._gradient_descent()
-        elif self.optimizer == "normal_equation":
-            self._normal_equation()
+        self._fit_impl()
     
     def _gradient_descent(self) -> None:
         """Perform gradient descent to optimize the weights"""
+        # The gradient X^T (X w - y) / n only depends on the data through
+        # X^T X and X^T y, so each step is O(d^2) instead of O(n d).
+        n = self.X.shape[0]
+        XtX, Xty = self._normal_matrices()
+        self._XtX = XtX / n
+        self._Xty = Xty / n
         for _ in range(self.iterations):
             self.weights -= self.learning_rate * self._gradient()
     
+    def _gradient_descent_jax(self) -> None:
+        """Perform gradient descent with the whole loop compiled by jax"""
+        import jax
+        import jax.numpy as jnp
+
+        n = self.X.shape[0]
+        XtX, Xty = self._normal_matrices()
+        run = jax.jit(_jax_gradient_descent, static_argnums=4)
+        weights = run(jnp.asarray(XtX / n), jnp.asarray(Xty / n), jnp.asarray(self.weights),
+                      self.learning_rate, self.iterations)
+        self.weights = np.asarray(weights, dtype=self.weights.dtype)
+
     def _gradient(self) -> np.ndarray:
         """Calculate the gradient"""
-        y_pred = self.predict(self.X)
-        return self.X.T.dot(y_pred - self.y) / self.X.shape[0]
+        return self._XtX.dot(self.weights) - self._Xty
     
     def _normal_equation(self) -> None:
         """Calculate the weights using the normal equation"""
-        self.weights = np.linalg.inv(self.X.T.dot(self.X)).dot(self.X.T).dot(self.y)
+        # X^T X is symmetric positive semi-definite, so it can be solved with
+        # a Cholesky factorization. If X has dependent columns it is only
+        # semi-definite, then a ridge relative to its scale makes it definite.
+        A, b = self._normal_matrices()
+        try:
+            factor = cho_factor(A)
+        except LinAlgError:
+            A[np.diag_indices_from(A)] += 1e-8 * np.trace(A) / len(A)
+            factor = cho_factor(A)
+        self.weights = cho_solve(factor, b)
+
+    def _normal_matrices(self) -> tuple:
+        """Calculate X^T X and X^T y"""
+        return self.X.T.dot(self.X), self.X.T.dot(self.y)
 
     def _initialize_weights(self) -> None:
         """Initialize the weights"""
@@ -54,3 +103,14 @@ class LinearRegression:
             The predictions as a numpy array
         """
         return X.dot(self.weights)
+
+
+def _jax_gradient_descent(XtX, Xty, weights, learning_rate, iterations):
+    """Gradient descent on the precomputed X^T X / n and X^T y / n, written
+    with jax.lax so the whole loop can be jit-compiled"""
+    from jax import lax
+
+    def step(_, weights):
+        return weights - learning_rate * (XtX @ weights - Xty)
+
+    return lax.fori_loop(0, iterations, step, weights)
@@ -0,0 +1,97 @@
+"""Tests for linear_regression.py"""
+
+import unittest
+
+import numpy as np
+
+from linear_regression import LinearRegression
+
+
+class LinearRegressionTest(unittest.TestCase):
+
+    def test_fit_default_optimizer(self):
+        # fit used to call a missing _optimize method before dispatching.
+        X = np.c_[np.ones(4), [0., 1., 2., 3.]]
+        model = LinearRegression()
+        model.fit(X, X.dot([1, 2]))
+        self.assertEqual(model.weights.shape, (2,))
+
+    def test_normal_equation(self):
+        rng = np.random.default_rng(0)
+        X = np.c_[np.ones(100), rng.random((100, 2))]
+        y = X.dot([1, 2, 3])
+        model = LinearRegression("normal_equation")
+        model.fit(X, y)
+        np.testing.assert_allclose(model.weights, [1, 2, 3])
+
+    def test_normal_equation_integer_X(self):
+        rng = np.random.default_rng(0)
+        X = rng.integers(0, 10, size=(100, 3))
+        y = X.dot([1, 2, 3])
+        model = LinearRegression("normal_equation")
+        model.fit(X, y)
+        np.testing.assert_allclose(model.weights, [1, 2, 3])
+
+    def test_gradient_descent_single_step(self):
+        # The precomputed X^T X and X^T y give the usual X^T (X w - y) / n step.
+        rng = np.random.default_rng(0)
+        X = rng.random((50, 3))
+        y = rng.random(50)
+        model = LinearRegression(learning_rate=0.1, iterations=1)
+        model.fit(X, y)
+        expected = -0.1 * X.T.dot(X.dot(np.zeros(3)) - y) / 50
+        np.testing.assert_allclose(model.weights, expected)
+
+    def test_gradient_descent_integer_X(self):
+        X = np.c_[np.ones(4, dtype=int), [0, 1, 2, 3]]
+        y = np.array([1, 3, 5, 7])
+        model = LinearRegression(learning_rate=0.1, iterations=5000)
+        model.fit(X, y)
+        self.assertEqual(model.X.dtype, np.float64)
+        np.testing.assert_allclose(model.weights, [1, 2])
+
+    def test_normal_equation_badly_scaled_X(self):
+        rng = np.random.default_rng(0)
+        X = rng.standard_normal((100, 3)) * 1e-6
+        y = X.dot([1, 2, 3])
+        model = LinearRegression("normal_equation")
+        model.fit(X, y)
+        np.testing.assert_allclose(model.weights, [1, 2, 3])
+
+    def test_normal_equation_dependent_columns(self):
+        rng = np.random.default_rng(0)
+        x = rng.random(100)
+        X = np.c_[np.ones(100), x, x]
+        y = X.dot([1, 2, 2])
+        model = LinearRegression("normal_equation")
+        model.fit(X, y)
+        np.testing.assert_allclose(model.predict(X), y, atol=1e-6)
+
+    def test_gradient_descent(self):
+        rng = np.random.default_rng(0)
+        X = np.c_[np.ones(100), rng.random((100, 2))]
+        y = X.dot([1, 2, 3])
+        model = LinearRegression(learning_rate=0.5, iterations=20000)
+        model.fit(X, y)
+        np.testing.assert_allclose(model.weights, [1, 2, 3])
+
+    def test_gradient_descent_jax(self):
+        rng = np.random.default_rng(0)
+        X = np.c_[np.ones(100), rng.random((100, 2))]
+        y = X.dot([1, 2, 3])
+        model = LinearRegression(learning_rate=0.5, iterations=20000, backend="jax")
+        model.fit(X, y)
+        self.assertEqual(model.weights.dtype, np.float64)
+        np.testing.assert_allclose(model.weights, [1, 2, 3], atol=1e-4)
+
+    def test_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            LinearRegression("foo")
+        with self.assertRaises(ValueError):
+            LinearRegression(backend="foo")
+        with self.assertRaises(ValueError):
+            LinearRegression("normal_equation", backend="jax")
+
+
+if __name__ == '__main__':
+    unittest.main()
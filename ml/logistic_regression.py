@@ -1,53 +1,114 @@
 """Includes implementation of logistic regression algorithm.
 
-Implementation of softmax regression using batch gradient descent.
+Implementation of softmax regression using batch gradient descent, or
+mini-batch gradient descent when a `batch_size` is given.
 
 Reference: Hands-On Machine Learning, Aurélien Géron
 """
 
 
+from typing import Optional
+
 import numpy as np
 
 
 def softmax(logits):
     # The dimensions and interpretation of the logits matrix is above
     # It is an m * k matrix, with each row containing the scores for instance i
-    exps = np.exp(logits)
+    # Softmax is shift invariant, subtracting the row max keeps exp from
+    # overflowing for large scores.
+    exps = np.exp(logits - logits.max(axis=1, keepdims=True))
     exp_sums = exps.sum(axis=1, keepdims=True)
     return exps / exp_sums
 
-def to_one_hot(y):
-    return np.diag(np.ones(y.max() + 1))[y]
+def to_one_hot(y, dtype=np.float64):
+    one_hot = np.zeros((len(y), y.max() + 1), dtype=dtype)
+    one_hot[np.arange(len(y)), y] = 1
+    return one_hot
+
+def _jax_fit(X, Y_one_hot, Theta, eta, n_epochs):
+    # Same update as LogisticRegression._step, written with jax.lax so the
+    # whole training loop can be jit-compiled.
+    import jax
+    from jax import lax
+
+    m = X.shape[0]
+
+    def step(_, Theta):
+        errors = jax.nn.softmax(X @ Theta, axis=1) - Y_one_hot
+        return Theta - eta / m * (X.T @ errors)
+
+    return lax.fori_loop(0, n_epochs, step, Theta)
 
 
 class LogisticRegression:
     X: np.ndarray
     y: np.ndarray
 
-    def __init__(self, eta: float = 0.5, n_epochs: int = 5000, eps: float = 1e-5) -> None:
+    def __init__(self, eta: float = 0.5, n_epochs: int = 5000, eps: float = 1e-5,
+                 batch_size: Optional[int] = None, backend: str = "numpy",
+                 dtype: type = np.float32) -> None:
+        if backend not in ("numpy", "jax"):
+            raise ValueError(f"Unknown backend: {backend}")
+        if backend == "jax" and batch_size is not None:
+            raise ValueError("The jax backend only supports full batch gradient descent")
         self.eta = eta
         self.n_epochs = n_epochs
         self.eps = eps
+        self.batch_size = batch_size            # None means full batch
+        self.backend = backend                  # "jax" compiles the whole training loop
+        self.dtype = dtype                      # float32 halves the memory traffic of each epoch
     
     def fit(self, X: np.ndarray, y: np.ndarray) -> None:
-        self.X = X
+        self.X = np.asarray(X, dtype=self.dtype)
         self.y = y
         self.m = len(self.X)
         n_inputs = self.X.shape[1]             # 3 (2 features + 1 bias)
         n_outputs = len(np.unique(self.y))     # 3 (there are 3 iris classes
-        self.Theta = np.random.randn(n_inputs, n_outputs)
-        Y_train_one_hot = to_one_hot(self.y)
+        self.Theta = np.random.randn(n_inputs, n_outputs).astype(self.dtype)
+        Y_train_one_hot = to_one_hot(self.y, self.dtype)
 
+        if self.backend == "jax":
+            import jax
+            import jax.numpy as jnp
+
+            run = jax.jit(_jax_fit, static_argnums=4)
+            Theta = run(jnp.asarray(self.X), jnp.asarray(Y_train_one_hot), jnp.asarray(self.Theta),
+                        self.eta, self.n_epochs)
+            # Without jax_enable_x64 jax trains in float32, Theta still gets
+            # the requested dtype.
+            self.Theta = np.asarray(Theta, dtype=self.dtype)
+            return
+
+        if self.batch_size is None or self.batch_size >= self.m:
+            self.X_T = np.ascontiguousarray(self.X.T)
+            errors = np.empty((self.m, n_outputs), dtype=self.dtype)
+            for epoch in range(self.n_epochs):
+                self._step(self.X, self.X_T, Y_train_one_hot, errors)
+            return
+
+        errors = np.empty((self.batch_size, n_outputs), dtype=self.dtype)
         for epoch in range(self.n_epochs):
-            logits  = self.X @ self.Theta
-            Y_proba = softmax(logits)                   # This is an m * k matrix with each column containing probability of class j
+            order = np.random.permutation(self.m)
+            for start in range(0, self.m, self.batch_size):
+                idx = order[start:start + self.batch_size]
+                X_batch = self.X[idx]
+                self._step(X_batch, X_batch.T, Y_train_one_hot[idx], errors[:len(idx)])
+
+    def _step(self, X: np.ndarray, X_T: np.ndarray, Y_one_hot: np.ndarray,
+              errors: np.ndarray) -> None:
+        # The errors buffer holds the logits, then the probabilities, then the
+        # errors, so no temporaries are allocated per step.
+        np.dot(X, self.Theta, out=errors)
+        errors -= errors.max(axis=1, keepdims=True)
+        np.exp(errors, out=errors)
+        errors /= errors.sum(axis=1, keepdims=True)  # Y_proba, row i holds the class probabilities of instance i
+        errors -= Y_one_hot
 
-            errors = Y_proba - Y_train_one_hot
-            gradients = 1 / self.m * (self.X.T @ errors)    # Compute gradient
+        gradients = 1 / len(X) * (X_T @ errors)         # Compute gradient
 
-            self.Theta = self.Theta - self.eta * gradients             # Gradient descent step
+        self.Theta -= self.eta * gradients              # Gradient descent step
 
     def predict(self, X: np.ndarray) -> np.ndarray:
-        logits = X @ self.Theta
-        Y_proba = softmax(logits)
-        return np.argmax(Y_proba, axis=1)
+        # Softmax is monotonic, so the largest logit is the most likely class.
+        return np.argmax(X @ self.Theta, axis=1)
@@ -0,0 +1,105 @@
+"""Tests for logistic_regression.py"""
+
+import unittest
+
+import numpy as np
+
+from logistic_regression import LogisticRegression, softmax, to_one_hot
+
+
+def make_blobs(m=300, seed=0):
+    """Three well separated classes, with a bias column."""
+    rng = np.random.default_rng(seed)
+    y = rng.integers(0, 3, m)
+    centers = np.array([[0, 4], [4, 0], [-4, -4]])
+    X = centers[y] + rng.standard_normal((m, 2))
+    return np.c_[np.ones(m), X], y
+
+
+class SoftmaxTest(unittest.TestCase):
+
+    def test_softmax(self):
+        proba = softmax(np.log(np.array([[1., 3.], [2., 2.]])))
+        np.testing.assert_allclose(proba, [[0.25, 0.75], [0.5, 0.5]])
+
+    def test_softmax_large_logits(self):
+        proba = softmax(np.array([[1000., 0.], [1000., 1000.]]))
+        self.assertTrue(np.isfinite(proba).all())
+        np.testing.assert_allclose(proba.sum(axis=1), 1)
+        np.testing.assert_allclose(proba, [[1, 0], [0.5, 0.5]])
+
+
+class ToOneHotTest(unittest.TestCase):
+
+    def test_to_one_hot(self):
+        one_hot = to_one_hot(np.array([2, 0]))
+        self.assertEqual(one_hot.dtype, np.float64)
+        np.testing.assert_array_equal(one_hot, [[0, 0, 1], [1, 0, 0]])
+
+    def test_to_one_hot_dtype(self):
+        one_hot = to_one_hot(np.array([1, 0, 1]), np.float32)
+        self.assertEqual(one_hot.dtype, np.float32)
+        np.testing.assert_array_equal(one_hot, [[0, 1], [1, 0], [0, 1]])
+
+
+class LogisticRegressionTest(unittest.TestCase):
+
+    def setUp(self):
+        np.random.seed(0)
+        self.X, self.y = make_blobs()
+
+    def accuracy(self, **kwargs):
+        model = LogisticRegression(n_epochs=200, **kwargs)
+        model.fit(self.X, self.y)
+        return np.mean(model.predict(self.X) == self.y), model
+
+    def test_full_batch_float64(self):
+        accuracy, model = self.accuracy(dtype=np.float64)
+        self.assertEqual(model.Theta.dtype, np.float64)
+        self.assertGreaterEqual(accuracy, 0.98)
+
+    def test_float32(self):
+        full_batch, _ = self.accuracy(dtype=np.float64)
+        accuracy, model = self.accuracy()
+        self.assertEqual(model.Theta.dtype, np.float32)
+        self.assertGreaterEqual(accuracy, full_batch)
+
+    def test_mini_batch(self):
+        full_batch, _ = self.accuracy(dtype=np.float64)
+        accuracy, _ = self.accuracy(batch_size=32)
+        self.assertGreaterEqual(accuracy, full_batch)
+
+    def test_jax(self):
+        full_batch, _ = self.accuracy(dtype=np.float64)
+        accuracy, model = self.accuracy(backend="jax", dtype=np.float64)
+        self.assertEqual(model.Theta.dtype, np.float64)
+        self.assertGreaterEqual(accuracy, full_batch)
+
+    def test_fused_step(self):
+        # The in-place softmax/error buffer gives the textbook update.
+        np.random.seed(1)
+        Theta = np.random.randn(3, 3)
+        Y = to_one_hot(self.y)
+        for _ in range(3):
+            errors = softmax(self.X @ Theta) - Y
+            Theta = Theta - 0.5 / len(self.X) * (self.X.T @ errors)
+        np.random.seed(1)
+        model = LogisticRegression(n_epochs=3, dtype=np.float64)
+        model.fit(self.X, self.y)
+        np.testing.assert_allclose(model.Theta, Theta)
+
+    def test_predict(self):
+        _, model = self.accuracy(dtype=np.float64)
+        X = np.c_[np.ones(4), [[0, 4], [4, 0], [-4, -4], [1000, 0]]]
+        expected = np.argmax(softmax(X @ model.Theta), axis=1)
+        np.testing.assert_array_equal(model.predict(X), expected)
+
+    def test_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            LogisticRegression(backend="foo")
+        with self.assertRaises(ValueError):
+            LogisticRegression(backend="jax", batch_size=32)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -7,12 +7,135 @@ book. This code is optimized for readability along with the book.
 """
 
 
-from numbers import Number
-from copy import deepcopy
+from numbers import Integral, Number
+
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:  # Numba is optional, the kernels then run as plain Python.
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda f: f
 
 INF = float('inf')
 
 
+@njit(cache=True)
+def _bfs(adj_head, adj_edges, edge_to, edge_cap, edge_flow,
+         dist, parent_v, parent_e, queue, s, t):
+    """
+    Builds the level graph from `s` in `dist` and the BFS tree in
+    `parent_v`/`parent_e`. `queue` needs room for every vertex, each one is
+    enqueued at most once. Returns whether `t` is reachable.
+    """
+    dist[s] = 0
+    queue[0] = s
+    head = 0
+    tail = 1
+    while head < tail:
+        u = queue[head]
+        head += 1
+        if u == t:
+            break
+        level = dist[u]+1
+        for i in range(adj_head[u], adj_head[u+1]):
+            idx = adj_edges[i]
+            v = edge_to[idx]
+            if dist[v] == -1 and edge_cap[idx] > edge_flow[idx]:
+                dist[v] = level
+                queue[tail] = v
+                tail += 1
+                parent_v[v] = u
+                parent_e[v] = idx
+    return dist[t] != -1
+
+
+@njit(cache=True)
+def _send_flow(edge_cap, edge_flow, parent_v, parent_e, s, t):
+    """
+    Pushes the bottleneck capacity along the BFS tree path from `s` to `t`
+    and returns it. The reverse of edge `idx` is always `idx ^ 1`.
+    """
+    f = edge_cap[parent_e[t]] - edge_flow[parent_e[t]]
+    v = parent_v[t]
+    while v != s:
+        idx = parent_e[v]
+        residual = edge_cap[idx] - edge_flow[idx]
+        if residual < f:
+            f = residual
+        v = parent_v[v]
+    v = t
+    while v != s:
+        idx = parent_e[v]
+        edge_flow[idx] += f
+        edge_flow[idx ^ 1] -= f
+        v = parent_v[v]
+    return f
+
+
+@njit(cache=True)
+def _dinic_dfs(adj_head, adj_edges, edge_to, edge_cap, edge_flow,
+               dist, last, stack, path, s, t):
+    """
+    Sends a blocking flow along the level graph in `dist` and returns its
+    value. `stack` holds the vertices of the current path and `path` the
+    edges between them, both need room for every vertex.
+    """
+    total = 0
+    depth = 0
+    stack[0] = s
+    while depth >= 0:
+        u = stack[depth]
+        if u == t:
+            f = edge_cap[path[0]] - edge_flow[path[0]]
+            bottleneck = 0
+            for i in range(1, depth):
+                residual = edge_cap[path[i]] - edge_flow[path[i]]
+                if residual < f:
+                    f = residual
+                    bottleneck = i
+            for i in range(depth):
+                edge_flow[path[i]] += f
+                edge_flow[path[i] ^ 1] -= f
+            total += f
+            # Retreat to the tail of the saturated edge.
+            depth = bottleneck
+            continue
+        end = adj_head[u+1]
+        level = dist[u]+1
+        i = last[u]
+        if level > dist[t]:
+            # `t` is on an earlier level, so `u` is a dead end without
+            # scanning its edges.
+            i = end
+        while i < end:
+            idx = adj_edges[i]
+            if dist[edge_to[idx]] == level and edge_cap[idx] > edge_flow[idx]:
+                break
+            i += 1
+        last[u] = i
+        if i < end:
+            path[depth] = adj_edges[i]
+            depth += 1
+            stack[depth] = edge_to[adj_edges[i]]
+        else:
+            # Dead end: nothing reaches `t` through `u` in this phase.
+            dist[u] = -1
+            depth -= 1
+    return total
+
+
+# Prefer the Cython kernels in maxflow_core.pyx when they are compiled. The
+# Numba ones above keep their names so the two can be compared in tests.
+try:
+    from maxflow_core import (bfs as _bfs_kernel, dinic_dfs as _dinic_dfs_kernel,
+                              send_flow as _send_flow_kernel)
+except ImportError:
+    _bfs_kernel, _dinic_dfs_kernel, _send_flow_kernel = _bfs, _dinic_dfs, _send_flow
+
+
 class MaximumFlow:
     def __init__(self, vertices: int):
         """
@@ -35,57 +158,43 @@ class MaximumFlow:
             6
         """
         self.vertices = vertices
-        self.edge_list = []
-        self.adjacency_list = [list() for _ in range(self.vertices)]
-        self.distances = []
-        self.last = []
-        self.points = []
+        # Edges are collected in plain lists by `add_edge` and packed into
+        # the arrays below by `finalize`.
+        self.edge_from = []
+        self.edge_to_list = []
+        self.edge_cap_list = []
+        self.edge_to = None
+        self.edge_cap = None
+        self.edge_flow = None
+        self.adj_head = None
+        self.adj_edges = None
+        self.finalized = False
+        # Per-vertex scratch space, allocated once and reused by every BFS
+        # and DFS.
+        self.distances = np.full(self.vertices, -1, dtype=np.int64)
+        self.parent_v = np.full(self.vertices, -1, dtype=np.int64)
+        self.parent_e = np.full(self.vertices, -1, dtype=np.int64)
+        self.last = np.zeros(self.vertices, dtype=np.int64)
+        self.queue = np.empty(self.vertices, dtype=np.int64)
+        self.stack = np.empty(self.vertices, dtype=np.int64)
+        self.path = np.empty(self.vertices, dtype=np.int64)
         self.has_been_run = False
 
     def BFS(self, s: int, t: int) -> bool:
-        self.distances = [-1] * self.vertices
-        self.distances[s] = 0
-        self.points = [[-1, -1] for _ in range(self.vertices)]
-        q = [s]
-        while len(q) != 0:
-            u = q[0]
-            q.pop(0)
-            if u == t:
-                break
-            for idx in self.adjacency_list[u]:
-                v, cap, flow = self.edge_list[idx]
-                if cap - flow > 0 and self.distances[v] == -1:
-                    self.distances[v] = self.distances[u]+1
-                    q.append(v)
-                    self.points[v] = [u, idx]
-        return self.distances[t] != -1
-
-    def send_one_flow(self, s: int, t: int, f: Number = INF) -> Number:
-        if s == t:
-            return f
-        u, idx = self.points[t]
-        _, cap, flow = self.edge_list[idx]
-        pushed = self.send_one_flow(s, u, min(f, cap-flow))
-        flow += pushed
-        self.edge_list[idx][2] = flow
-        self.edge_list[idx ^ 1][2] -= pushed
-        return pushed
-
-    def DFS(self, u: int, t: int, f: Number = INF) -> Number:
-        if u == t or f == 0:
-            return f
-        for i in range(self.last[u], len(self.adjacency_list[u])):
-            self.last[u] = i
-            v, cap, flow = self.edge_list[self.adjacency_list[u][i]]
-            if self.distances[v] != self.distances[u]+1:
-                continue
-            pushed = self.DFS(v, t, min(f, cap - flow))
-            if pushed != 0:
-                flow += pushed
-                self.edge_list[self.adjacency_list[u][i]][2] = flow
-                self.edge_list[self.adjacency_list[u][i] ^ 1][2] -= pushed
-                return pushed
-        return 0
+        self.distances.fill(-1)
+        return _bfs_kernel(self.adj_head, self.adj_edges, self.edge_to,
+                           self.edge_cap, self.edge_flow, self.distances,
+                           self.parent_v, self.parent_e, self.queue, s, t)
+
+    def DFS(self, s: int, t: int) -> Number:
+        """
+        Sends a blocking flow from `s` to `t` along the level graph built by
+        the last BFS and returns its value. `self.last[u]` is the current arc
+        of `u`, so edges that can no longer be used are never scanned twice.
+        """
+        return _dinic_dfs_kernel(self.adj_head, self.adj_edges, self.edge_to,
+                                 self.edge_cap, self.edge_flow, self.distances,
+                                 self.last, self.stack, self.path, s, t)
 
     def add_edge(self, u: int, v: int, capacity: Number,
                  directed: bool = True) -> None:
@@ -105,12 +214,51 @@ class MaximumFlow:
             >>> mf.add_edge(0, 1, 3)
             >>> mf.add_edge(2, 1, 3)
         """
+        self.assert_is_vertex(u)
+        self.assert_is_vertex(v)
         if u == v:
             return
-        self.edge_list.append([v, capacity, 0])
-        self.adjacency_list[u].append(len(self.edge_list)-1)
-        self.edge_list.append([u, 0 if directed else capacity, 0])
-        self.adjacency_list[v].append(len(self.edge_list)-1)
+        # Edge `idx` and its reverse `idx ^ 1` are always added as a pair.
+        self.edge_from += [u, v]
+        self.edge_to_list += [v, u]
+        self.edge_cap_list += [capacity, 0 if directed else capacity]
+        self.finalized = False
+
+    def finalize(self) -> None:
+        """
+        Packs the edges added so far into parallel NumPy arrays `edge_to`,
+        `edge_cap` and `edge_flow`, and the adjacency lists into CSR form:
+        the edges leaving `u` are `adj_edges[adj_head[u]:adj_head[u+1]]`.
+        Called automatically by `edmonds_karp` and `dinic`.
+        """
+        if self.finalized:
+            return
+        if all(isinstance(c, Integral) for c in self.edge_cap_list):
+            dtype = np.int64
+        else:
+            dtype = np.float64
+        edge_from = np.asarray(self.edge_from, dtype=np.int64)
+        self.edge_to = np.asarray(self.edge_to_list, dtype=np.int64)
+        self.edge_cap = np.asarray(self.edge_cap_list, dtype=dtype)
+        self.edge_flow = np.zeros(len(self.edge_cap_list), dtype=dtype)
+        # A stable sort keeps each vertex's edges in insertion order.
+        self.adj_edges = np.argsort(edge_from, kind='stable')
+        self.adj_head = np.zeros(self.vertices + 1, dtype=np.int64)
+        np.cumsum(np.bincount(edge_from, minlength=self.vertices),
+                  out=self.adj_head[1:])
+        self.finalized = True
+
+    def assert_is_vertex(self, u: int) -> None:
+        # The kernels index their arrays unchecked, so bad vertices have to
+        # be caught before they get there.
+        if not 0 <= u < self.vertices:
+            raise IndexError(f'Vertex {u} is not in the range [0, {self.vertices})')
+
+    def assert_valid_source_and_sink(self, s: int, t: int) -> None:
+        self.assert_is_vertex(s)
+        self.assert_is_vertex(t)
+        if s == t:
+            raise ValueError('The source and the sink must be different vertices')
 
     def assert_has_not_already_been_run(self):
         if self.has_been_run:
@@ -134,11 +282,14 @@ class MaximumFlow:
         Returns:
             The max flow.
         """
+        self.assert_valid_source_and_sink(s, t)
         self.assert_has_not_already_been_run()
+        self.finalize()
 
         mf = 0
         while self.BFS(s, t):
-            f = self.send_one_flow(s, t)
+            f = _send_flow_kernel(self.edge_cap, self.edge_flow, self.parent_v,
+                                  self.parent_e, s, t)
             if f == 0:
                 break
             mf += f
@@ -156,20 +307,19 @@ class MaximumFlow:
         Returns:
             The max flow.
         """
+        self.assert_valid_source_and_sink(s, t)
         self.assert_has_not_already_been_run()
+        self.finalize()
 
         mf = 0
         while self.BFS(s, t):
-            self.last = [0] * self.vertices
-            f = self.DFS(s, t)
-            while f != 0:
-                mf += f
-                f = self.DFS(s, t)
+            self.last[:] = self.adj_head[:-1]
+            mf += self.DFS(s, t)
         return mf
 
     def copy(self) -> 'MaximumFlow':
         """
-        Returns a deep copy of the current instance. This is convenient for
+        Returns a copy of the current instance. This is convenient for
         problems where you need to run MaxFlow multiple times on slightly
         different graphs, since the instance is destroyed after each max flow
         run.
@@ -183,11 +333,26 @@ class MaximumFlow:
             >>>     mf_copy.add_edge(2, 3, c)
             >>>     res = mf_copy.dinic(0, 3)  # Will not modify mf
         """
-        return deepcopy(self)
+        new = MaximumFlow.__new__(MaximumFlow)
+        new.__dict__.update(self.__dict__)
+        new.edge_from = self.edge_from.copy()
+        new.edge_to_list = self.edge_to_list.copy()
+        new.edge_cap_list = self.edge_cap_list.copy()
+        for name in ('edge_to', 'edge_cap', 'edge_flow', 'adj_head',
+                     'adj_edges', 'distances', 'parent_v', 'parent_e', 'last',
+                     'queue', 'stack', 'path'):
+            array = getattr(self, name)
+            if array is not None:
+                setattr(new, name, array.copy())
+        return new
 
     def __repr__(self) -> str:
-        el = self.edge_list[:10] + ['...'] if len(self.edge_list) > 10 else self.edge_list
-        al = self.adjacency_list[:10] + ['...'] if len(self.adjacency_list) > 10 else self.adjacency_list
+        flows = self.edge_flow[:10].tolist() if self.finalized else [0] * 10
+        el = [[v, c, f] for v, c, f in zip(self.edge_to_list[:10], self.edge_cap_list, flows)]
+        el = el + ['...'] if len(self.edge_to_list) > 10 else el
+        al = [[idx for idx, u in enumerate(self.edge_from) if u == w]
+              for w in range(min(self.vertices, 10))]
+        al = al + ['...'] if self.vertices > 10 else al
         el = ', '.join(map(str, el))
         al = ', '.join(map(str, al))
         return f'MaxFlow(V={self.vertices}, EL=[{el}], AL=[{al}])'
@@ -1,16 +1,165 @@
 """Tests for max_flow.py."""
 
+import random
 import unittest
 
-# TODO: hard to test this module because it's all side effects
-# Redo the algortihm to break up into pieces so that it can be tested
-# in a bottom-up piece-by-peice fashion.
+import numpy as np
+
+import max_flow
+from max_flow import MaximumFlow
+
+try:
+    import maxflow_core
+except ImportError:
+    maxflow_core = None
+
 
 class TestMaxFlow(unittest.TestCase):
     def test_max_flow(self):
         """Test max flow."""
-        pass
+        mf = MaximumFlow(3)
+        mf.add_edge(0, 1, 3)
+        mf.add_edge(0, 2, 3)
+        mf.add_edge(1, 2, 3)
+        mf_copy = mf.copy()
+        self.assertEqual(mf.dinic(0, 2), 6)
+        self.assertEqual(mf_copy.edmonds_karp(0, 2), 6)
+
+    def test_float_capacities(self):
+        """Float capacities are kept as floats."""
+        mf = MaximumFlow(3)
+        mf.add_edge(0, 1, 1.5)
+        mf.add_edge(1, 2, 2.5)
+        mf.add_edge(0, 2, 0.25)
+        mf_copy = mf.copy()
+        self.assertEqual(mf.dinic(0, 2), 1.75)
+        self.assertEqual(mf_copy.edmonds_karp(0, 2), 1.75)
+        self.assertEqual(mf.edge_cap.dtype, np.float64)
+
+    def test_int_capacities(self):
+        """Integer capacities are stored as int64."""
+        mf = MaximumFlow(2)
+        mf.add_edge(0, 1, 3)
+        self.assertEqual(mf.dinic(0, 1), 3)
+        self.assertEqual(mf.edge_cap.dtype, np.int64)
+
+    def test_undirected_edges(self):
+        """Undirected edges carry flow both ways."""
+        mf = MaximumFlow(4)
+        mf.add_edge(0, 1, 4)
+        mf.add_edge(2, 1, 3, directed=False)
+        mf.add_edge(2, 3, 5)
+        mf_copy = mf.copy()
+        self.assertEqual(mf.dinic(0, 3), 3)
+        self.assertEqual(mf_copy.edmonds_karp(0, 3), 3)
+
+        mf = MaximumFlow(4)
+        mf.add_edge(0, 1, 4)
+        mf.add_edge(2, 1, 3)
+        mf.add_edge(2, 3, 5)
+        self.assertEqual(mf.dinic(0, 3), 0)
+
+    def test_edmonds_karp_long_path(self):
+        """Augmenting paths longer than the recursion limit."""
+        n = 5000
+        mf = MaximumFlow(n)
+        for u in range(n - 1):
+            mf.add_edge(u, u + 1, 7)
+        self.assertEqual(mf.edmonds_karp(0, n - 1), 7)
+
+    def test_dinic_long_path(self):
+        """Level graphs deeper than the recursion limit."""
+        n = 5000
+        mf = MaximumFlow(n)
+        for u in range(n - 1):
+            mf.add_edge(u, u + 1, 7)
+        self.assertEqual(mf.dinic(0, n - 1), 7)
+
+    def test_invalid_source_or_sink(self):
+        """Bad vertices are rejected before any kernel runs."""
+        for s, t in [(0, 3), (0, 7), (-1, 2), (1, 1)]:
+            mf = MaximumFlow(3)
+            mf.add_edge(0, 1, 3)
+            mf.add_edge(1, 2, 3)
+            with self.assertRaises((IndexError, ValueError)):
+                mf.dinic(s, t)
+            with self.assertRaises((IndexError, ValueError)):
+                mf.edmonds_karp(s, t)
+
+    def test_add_edge_invalid_vertex(self):
+        """Edges must join vertices of the graph."""
+        mf = MaximumFlow(3)
+        for u, v in [(0, 3), (3, 0), (-1, 2), (1, -1)]:
+            with self.assertRaises(IndexError):
+                mf.add_edge(u, v, 1)
+
+
+
+def random_graph(V, E, float_capacities):
+    mf = MaximumFlow(V)
+    for _ in range(E):
+        capacity = random.randint(0, 20)
+        if float_capacities:
+            capacity += random.random()
+        mf.add_edge(random.randrange(V), random.randrange(V), capacity,
+                    directed=random.random() < 0.8)
+    mf.finalize()
+    return mf
+
+
+def run_kernels(mf, bfs, send_flow, dinic_dfs, s, t):
+    """Runs Edmonds-Karp and Dinic on copies of `mf` with the given kernels
+    and records every kernel result and the arrays they write."""
+    trace = []
+    ek = mf.copy()
+    while True:
+        ek.distances.fill(-1)
+        found = bfs(ek.adj_head, ek.adj_edges, ek.edge_to, ek.edge_cap,
+                    ek.edge_flow, ek.distances, ek.parent_v, ek.parent_e,
+                    ek.queue, s, t)
+        trace.append((found, ek.distances.tolist()))
+        if not found:
+            break
+        f = send_flow(ek.edge_cap, ek.edge_flow, ek.parent_v, ek.parent_e, s, t)
+        trace.append((f, ek.edge_flow.tolist()))
+    dinic = mf.copy()
+    while True:
+        dinic.distances.fill(-1)
+        found = bfs(dinic.adj_head, dinic.adj_edges, dinic.edge_to,
+                    dinic.edge_cap, dinic.edge_flow, dinic.distances,
+                    dinic.parent_v, dinic.parent_e, dinic.queue, s, t)
+        trace.append((found, dinic.distances.tolist()))
+        if not found:
+            break
+        dinic.last[:] = dinic.adj_head[:-1]
+        f = dinic_dfs(dinic.adj_head, dinic.adj_edges, dinic.edge_to,
+                      dinic.edge_cap, dinic.edge_flow, dinic.distances,
+                      dinic.last, dinic.stack, dinic.path, s, t)
+        trace.append((f, dinic.edge_flow.tolist(), dinic.last.tolist()))
+    return trace
+
+
+@unittest.skipUnless(maxflow_core, 'maxflow_core has not been compiled')
+class TestMaxFlowCore(unittest.TestCase):
+    def compare_kernels(self, float_capacities):
+        random.seed(0)
+        for _ in range(200):
+            V = random.randint(2, 30)
+            mf = random_graph(V, random.randint(0, 120), float_capacities)
+            expected = run_kernels(mf, max_flow._bfs, max_flow._send_flow,
+                                   max_flow._dinic_dfs, 0, V - 1)
+            actual = run_kernels(mf, maxflow_core.bfs, maxflow_core.send_flow,
+                                 maxflow_core.dinic_dfs, 0, V - 1)
+            self.assertEqual(expected, actual)
+
+    def test_int_capacities(self):
+        """The Cython kernels match the Numba ones on int64 capacities."""
+        self.compare_kernels(float_capacities=False)
+
+    def test_float_capacities(self):
+        """The Cython kernels match the Numba ones on float64 capacities."""
+        self.compare_kernels(float_capacities=True)
 
 
 if __name__ == '__main__':
-    unittest.main()
\ No newline at end of file
+    unittest.main()
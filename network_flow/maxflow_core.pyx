@@ -0,0 +1,116 @@
+# cython: language_level=3
+""" Cython versions of the max flow kernels in max_flow.py.
+
+They take the same arguments as `_bfs`, `_send_flow` and `_dinic_dfs` there
+and are used in their place whenever this module has been compiled, e.g.
+with `cythonize -i maxflow_core.pyx` from this directory. Capacities and
+flows may be int64 or float64 arrays, everything else is int64.
+"""
+
+cimport cython
+from libc.stdint cimport int64_t
+
+ctypedef fused flow_t:
+    int64_t
+    double
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+def bfs(const int64_t[::1] adj_head, const int64_t[::1] adj_edges,
+        const int64_t[::1] edge_to, const flow_t[::1] edge_cap,
+        flow_t[::1] edge_flow, int64_t[::1] dist, int64_t[::1] parent_v,
+        int64_t[::1] parent_e, int64_t[::1] queue, int64_t s, int64_t t):
+    cdef int64_t head = 0, tail = 1, u, v, i, idx, level
+    dist[s] = 0
+    queue[0] = s
+    while head < tail:
+        u = queue[head]
+        head += 1
+        if u == t:
+            break
+        level = dist[u]+1
+        for i in range(adj_head[u], adj_head[u+1]):
+            idx = adj_edges[i]
+            v = edge_to[idx]
+            if dist[v] == -1 and edge_cap[idx] > edge_flow[idx]:
+                dist[v] = level
+                queue[tail] = v
+                tail += 1
+                parent_v[v] = u
+                parent_e[v] = idx
+    return dist[t] != -1
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+def send_flow(const flow_t[::1] edge_cap, flow_t[::1] edge_flow,
+              const int64_t[::1] parent_v, const int64_t[::1] parent_e,
+              int64_t s, int64_t t):
+    cdef int64_t v, idx
+    cdef flow_t residual
+    cdef flow_t f = edge_cap[parent_e[t]] - edge_flow[parent_e[t]]
+    v = parent_v[t]
+    while v != s:
+        idx = parent_e[v]
+        residual = edge_cap[idx] - edge_flow[idx]
+        if residual < f:
+            f = residual
+        v = parent_v[v]
+    v = t
+    while v != s:
+        idx = parent_e[v]
+        edge_flow[idx] += f
+        edge_flow[idx ^ 1] -= f
+        v = parent_v[v]
+    return f
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+def dinic_dfs(const int64_t[::1] adj_head, const int64_t[::1] adj_edges,
+              const int64_t[::1] edge_to, const flow_t[::1] edge_cap,
+              flow_t[::1] edge_flow, int64_t[::1] dist, int64_t[::1] last,
+              int64_t[::1] stack, int64_t[::1] path, int64_t s, int64_t t):
+    cdef int64_t depth = 0, bottleneck, u, i, idx, end, level
+    cdef flow_t f, residual, total = 0
+    stack[0] = s
+    while depth >= 0:
+        u = stack[depth]
+        if u == t:
+            f = edge_cap[path[0]] - edge_flow[path[0]]
+            bottleneck = 0
+            for i in range(1, depth):
+                residual = edge_cap[path[i]] - edge_flow[path[i]]
+                if residual < f:
+                    f = residual
+                    bottleneck = i
+            for i in range(depth):
+                edge_flow[path[i]] += f
+                edge_flow[path[i] ^ 1] -= f
+            total += f
+            # Retreat to the tail of the saturated edge.
+            depth = bottleneck
+            continue
+        end = adj_head[u+1]
+        level = dist[u]+1
+        i = last[u]
+        if level > dist[t]:
+            # `t` is on an earlier level, so `u` is a dead end without
+            # scanning its edges.
+            i = end
+        while i < end:
+            idx = adj_edges[i]
+            if dist[edge_to[idx]] == level and edge_cap[idx] > edge_flow[idx]:
+                break
+            i += 1
+        last[u] = i
+        if i < end:
+            path[depth] = adj_edges[i]
+            depth += 1
+            stack[depth] = edge_to[adj_edges[i]]
+        else:
+            # Dead end: nothing reaches `t` through `u` in this phase.
+            dist[u] = -1
+            depth -= 1
+    return total